@@ -0,0 +1,121 @@
+"""Cold start benchmark of the webhook path.
+
+Every run starts a fresh interpreter that imports the bot, creates it and processes a single
+/start update against a local fake Bot API. Two startup paths are measured:
+
+  * webhook: process_webhook_update() with the lazily built standalone dispatcher;
+  * updater: the eager path, building the Updater before handing it the update.
+
+For each of them the benchmark reports:
+
+  * import: time to import resistance_bot and create the bot, including the Updater build on
+    the eager path;
+  * first response: time from spawning the interpreter to the reply reaching the Bot API.
+
+The webhook path defers telegram.ext and the handlers to the first update, so its import
+figure leaves them out while the eager path's includes them. Only the first response times
+compare both paths like for like.
+
+Run from the repository root:
+
+    python benchmarks/startup.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from resistance_bot.replay import FakeBotAPI, REPLAY_TOKEN  # noqa: E402
+
+
+START_UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1,
+        'date': 0,
+        'chat': {'id': 1, 'type': 'private'},
+        'from': {'id': 1, 'is_bot': False, 'first_name': "User 1"},
+        'text': '/start',
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+    },
+}
+
+CHILD_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+from resistance_bot import ResistanceBot
+bot = ResistanceBot({token!r}, base_url={base_url!r})
+if {mode!r} == 'updater':
+    import telegram
+    dispatcher = bot.dispatcher
+imported = time.perf_counter()
+data = json.loads({update!r})
+if {mode!r} == 'webhook':
+    bot.process_webhook_update(data)
+else:
+    dispatcher.process_update(telegram.Update.de_json(data, dispatcher.bot))
+print(json.dumps({{'import': imported - started}}))
+sys.stdout.flush()
+# The Updater's worker threads would otherwise keep the interpreter alive
+os._exit(0)
+"""
+
+MODES = ['webhook', 'updater']
+
+
+class TimingBotAPI(FakeBotAPI):
+    def __init__(self):
+        super().__init__()
+        self.first_response = None
+
+    def handle(self, method: str, params: dict):
+        if method == 'sendMessage' and self.first_response is None:
+            self.first_response = time.perf_counter()
+        return super().handle(method, params)
+
+
+def run_once(api: TimingBotAPI, mode: str):
+    api.first_response = None
+    script = CHILD_SCRIPT.format(
+        token=REPLAY_TOKEN, base_url=api.base_url, update=json.dumps(START_UPDATE), mode=mode)
+
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    if api.first_response is None:
+        raise RuntimeError("The bot didn't respond to the update.")
+
+    return json.loads(output)['import'], api.first_response - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold start of the webhook path.")
+    parser.add_argument('--runs', type=int, default=10, help="number of fresh interpreters to start")
+    args = parser.parse_args()
+
+    api = TimingBotAPI()
+    api.start()
+    try:
+        # Runs of both modes are interleaved so that they share any drift of the machine's load
+        results = {mode: [] for mode in MODES}
+        for i in range(args.runs):
+            for mode in MODES:
+                results[mode].append(run_once(api, mode))
+    finally:
+        api.stop()
+
+    for mode in MODES:
+        for name, values in zip(['import', 'first response'], zip(*results[mode])):
+            print("{0} {1}: median {2:.1f} ms, min {3:.1f} ms, max {4:.1f} ms".format(
+                mode, name, statistics.median(values) * 1000, min(values) * 1000, max(values) * 1000))
+
+
+if __name__ == '__main__':
+    main()
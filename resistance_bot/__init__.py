@@ -1 +1,6 @@
-from .core import ResistanceBot
+def __getattr__(name):
+    # Importing the bot pulls in telegram, so it is deferred until the bot is actually used
+    if name == 'ResistanceBot':
+        from .core import ResistanceBot
+        return ResistanceBot
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
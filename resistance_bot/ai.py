@@ -0,0 +1,141 @@
+"""Computer players filling empty seats of a game.
+
+AI players are synthetic users registered like everyone else and acting through the regular
+`GameInstance` API. Every decision is a handful of lookups and a sort over at most
+MAX_PLAYERS players, so a move takes microseconds.
+"""
+
+from itertools import count
+from typing import Dict, List
+
+import telegram
+
+from .game import GameInstance, GameState, PARTY_SIZES, VOTE_LIMIT, get_winning_count
+
+
+def _round_rules(player_count: int):
+    return tuple(
+        (party_size, get_winning_count(player_count, round_idx))
+        for round_idx, party_size in enumerate(PARTY_SIZES[player_count]))
+
+
+# Party size and the number of black cards needed to fail the mission, per round for every
+# possible player count
+ROUND_RULES = {player_count: _round_rules(player_count) for player_count in PARTY_SIZES}
+
+# Synthetic users get negative ids so that they never clash with real ones
+_user_ids = count(-1, -1)
+
+
+def create_user() -> telegram.User:
+    user_id = next(_user_ids)
+    return telegram.User(user_id, "Bot {0}".format(-user_id), is_bot=True)
+
+
+def is_ai(user: telegram.User):
+    return user.is_bot and user.id < 0
+
+
+def play(game: GameInstance, user: telegram.User):
+    """Makes the move the game expects from an AI player, if any. Returns whether a move was made."""
+    strategy = SpyStrategy if user in game.spies else ResistanceStrategy
+
+    if game.state == GameState.PROPOSAL_PENDING and game.leader == user:
+        game.propose_party(user, strategy.propose_party(game, user))
+    elif game.state == GameState.PARTY_VOTE_IN_PROGRESS and user not in game.current_vote.ballots:
+        game.vote_party(user, strategy.vote_party(game, user))
+    elif (game.state == GameState.MISSION_VOTE_IN_PROGRESS and user in game.current_party
+          and user not in game.current_round.ballots):
+        game.vote_mission(user, strategy.vote_mission(game, user))
+    else:
+        return False
+    return True
+
+
+def play_all(game: GameInstance):
+    """Lets every AI player of the game make their pending moves."""
+    for player in game.players:
+        if is_ai(player):
+            play(game, player)
+
+
+def _current_rules(game: GameInstance):
+    return ROUND_RULES[len(game.players)][len(game.rounds) - 1]
+
+
+def _is_last_vote(game: GameInstance):
+    return len(game.current_round.votes) >= VOTE_LIMIT
+
+
+class ResistanceStrategy:
+    @staticmethod
+    def propose_party(game: GameInstance, user: telegram.User) -> List[telegram.User]:
+        party_size, _ = _current_rules(game)
+        return [user] + ResistanceStrategy._ranked_others(game, user)[:party_size - 1]
+
+    @staticmethod
+    def vote_party(game: GameInstance, user: telegram.User) -> bool:
+        # Rejecting the last proposal hands the round to the spies
+        if game.leader == user or _is_last_vote(game):
+            return True
+
+        # Approve parties that are no more suspicious than the one we'd propose ourselves
+        party_size, _ = _current_rules(game)
+        suspicion = ResistanceStrategy._suspicion(game, user)
+        ranked = ResistanceStrategy._ranked_others(game, user, suspicion)
+        limit = suspicion[ranked[party_size - 2]]
+        return all(suspicion[x] <= limit for x in game.current_party if x != user)
+
+    @staticmethod
+    def vote_mission(game: GameInstance, user: telegram.User) -> bool:
+        return True
+
+    @staticmethod
+    def _ranked_others(game: GameInstance, user: telegram.User, suspicion: Dict[telegram.User, float] = None):
+        if suspicion is None:
+            suspicion = ResistanceStrategy._suspicion(game, user)
+        # Sorting is stable, so equally suspicious players keep their seat order
+        return sorted((x for x in game.players if x != user), key=suspicion.__getitem__)
+
+    @staticmethod
+    def _suspicion(game: GameInstance, user: telegram.User) -> Dict[telegram.User, float]:
+        # Black cards of every played mission are blamed evenly on its other members
+        suspicion = {x: 0.0 for x in game.players}
+        for round_ in game.rounds:
+            if not round_.votes or len(round_.ballots) < len(round_.last_vote.party):
+                continue
+
+            black_count = list(round_.ballots.values()).count(False)
+            suspects = [x for x in round_.last_vote.party if x != user]
+            if black_count and suspects:
+                for suspect in suspects:
+                    suspicion[suspect] += black_count / len(suspects)
+
+        return suspicion
+
+
+class SpyStrategy:
+    @staticmethod
+    def propose_party(game: GameInstance, user: telegram.User) -> List[telegram.User]:
+        # Take just enough spies to fail the mission, so that fewer of them are exposed
+        party_size, winning_count = _current_rules(game)
+        spies = [x for x in game.spies if x != user][:winning_count - 1]
+        resistance = [x for x in game.players if x not in game.spies][:party_size - 1 - len(spies)]
+        return [user] + spies + resistance
+
+    @staticmethod
+    def vote_party(game: GameInstance, user: telegram.User) -> bool:
+        # Rejecting the last proposal wins the round outright
+        if _is_last_vote(game):
+            return False
+
+        _, winning_count = _current_rules(game)
+        return sum(1 for x in game.current_party if x in game.spies) >= winning_count
+
+    @staticmethod
+    def vote_mission(game: GameInstance, user: telegram.User) -> bool:
+        # AI spies in the party agree by seat order on who plays the needed black cards. Human
+        # spies can't be relied on, so they don't take any of those turns
+        _, winning_count = _current_rules(game)
+        party_spies = [x for x in game.players if x in game.current_party and x in game.spies and is_ai(x)]
+        return party_spies.index(user) >= winning_count
@@ -1,11 +1,13 @@
+from __future__ import annotations
+
 import logging
-from typing import Dict
+import warnings
+from typing import TYPE_CHECKING, Dict
 
 import telegram
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext
 
-from .manager import GameManager
-from .ui import UI
+if TYPE_CHECKING:
+    from telegram.ext import CallbackContext
 
 
 logger = logging.getLogger(__name__)
@@ -14,35 +16,117 @@ logger = logging.getLogger(__name__)
 def display_start_message(update, context):
     update.message.reply_text(
         "*Welcome to Resistance Game Bot!*\n"
-        "Please _add this bot to a group_ and send /new\\_game to start a new game.",
+        "Please _add this bot to a group_ and send /new\\_game to start a new game, "
+        "or send /queue here to be matched into a quick game.",
         parse_mode='markdown')
 
 
 class ResistanceBot:
-    def __init__(self, token: str, request_kwargs=None):
+    def __init__(self, token: str, request_kwargs=None, base_url=None, record_path=None):
         self.token = token
+        self.users: Dict[str, telegram.User] = {}
+
+        self._request_kwargs = request_kwargs
+        self._base_url = base_url
+        self._record_path = record_path
+
+        # telegram.ext and the handlers are only loaded once the dispatcher is needed, which
+        # keeps startup cheap for short-lived webhook instances
+        self.gm = None
+        self.ui = None
+        self.mm = None
+        self.recorder = None
+        self._updater = None
+        self._dispatcher = None
+
+    @property
+    def dispatcher(self):
+        if self._dispatcher is None:
+            self._get_updater()
+        return self._dispatcher
+
+    def process_webhook_update(self, data: dict):
+        """Handles a single decoded webhook payload without starting any background threads."""
+        dispatcher = self._get_webhook_dispatcher()
+        dispatcher.process_update(telegram.Update.de_json(data, dispatcher.bot))
+
+        # Short-lived instances may be stopped at any moment, so the capture is kept readable
+        if self.recorder is not None:
+            self.recorder.flush()
 
+    def run(self):
+        updater = self._get_updater()
+        updater.start_polling()
+        updater.idle()
+        self.close()
+
+    def run_webhook(self, fqdn, ip='0.0.0.0', port=80):
+        updater = self._get_updater()
+        updater.start_webhook(ip, port, url_path=self.token)
+        updater.bot.set_webhook(f"https://{fqdn}/{self.token}")
+        updater.idle()
+        self.close()
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _get_updater(self):
+        if self._updater is None:
+            if self._dispatcher is not None:
+                raise RuntimeError("The bot already processes updates without an updater.")
+
+            from telegram.ext import Updater
+
+            self._updater = Updater(self.token, base_url=self._base_url, request_kwargs=self._request_kwargs)
+            self._setup_dispatcher(self._updater.dispatcher)
+        return self._updater
+
+    def _get_webhook_dispatcher(self):
+        # Without an updater, updates are processed synchronously in the caller's thread
+        if self._dispatcher is None:
+            from queue import Queue
+            from telegram.ext import Dispatcher
+            from telegram.utils.request import Request
+
+            request = Request(**self._request_kwargs) if self._request_kwargs else None
+            bot = telegram.Bot(self.token, base_url=self._base_url, request=request)
+
+            # No worker threads is the point here, so the warning about run_async is moot
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore', message='Asynchronous callbacks', category=UserWarning)
+                dispatcher = Dispatcher(bot, Queue(), workers=0)
+            self._setup_dispatcher(dispatcher)
+        return self._dispatcher
+
+    def _setup_dispatcher(self, dispatcher: telegram.ext.Dispatcher):
+        from telegram.ext import CommandHandler, MessageHandler, TypeHandler, Filters
+
+        from .manager import GameManager
+        from .matchmaking import Matchmaker
+        from .ui import UI
+
+        self._dispatcher = dispatcher
         self.gm = GameManager(self)
         self.ui = UI(self)
-        self.users: Dict[str, telegram.User] = {}
-        self._updater = Updater(self.token, request_kwargs=request_kwargs)
+        self.mm = Matchmaker(self)
 
-        dispatcher = self._updater.dispatcher
         self.gm.register_handlers(dispatcher, group=1)
         self.ui.register_handlers(dispatcher, group=2)
+        self.mm.register_handlers(dispatcher, group=3)
+
+        # Unlike the Filters.all message hook, a type handler also sees callback queries
+        if self._record_path:
+            from .replay import UpdateRecorder
 
+            self.recorder = UpdateRecorder(self._record_path)
+            dispatcher.add_handler(TypeHandler(telegram.Update, self._record_update), group=-2)
         dispatcher.add_handler(MessageHandler(Filters.all, self._update_username), group=-1)
         dispatcher.add_handler(CommandHandler('start', self._handle_start))
         dispatcher.add_error_handler(self._handle_error)
 
-    def run(self):
-        self._updater.start_polling()
-        self._updater.idle()
-
-    def run_webhook(self, fqdn, ip='0.0.0.0', port=80):
-        self._updater.start_webhook(ip, port, url_path=self.token)
-        self._updater.bot.set_webhook(f"https://{fqdn}/{self.token}")
-        self._updater.idle()
+    def _record_update(self, update: telegram.Update, context: CallbackContext):
+        self.recorder.record(update, context.bot.username)
 
     def _update_username(self, update: telegram.Update, context: CallbackContext):
         if update.effective_user.username:
@@ -32,6 +32,13 @@ MIN_2IN4TH = 7
 logger = logging.getLogger(__name__)
 
 
+def get_winning_count(player_count: int, round_idx: int):
+    # Number of black cards the spies need to play to win the round
+    if player_count >= MIN_2IN4TH and round_idx == 3:
+        return 2
+    return 1
+
+
 class GameError(Exception):
     pass
 
@@ -125,6 +132,8 @@ class GameInstance:
         # Should work fine as telegram.User compares user ids, not internal Python ids
         if user in self.players:
             raise GameError("Can't register twice!")
+        if len(self.players) >= MAX_PLAYERS:
+            raise GameError("The game is full!")
 
         self.players.append(user)
         self._log("Registered player %s", user.name)
@@ -257,10 +266,7 @@ class GameInstance:
 
     def _next_round_or_gameover(self):
         if self.outcome is None:
-            winning_count = 1
-            if len(self.players) >= MIN_2IN4TH and len(self.rounds) == 3:
-                winning_count = 2
-            self.rounds.append(Round(winning_count))
+            self.rounds.append(Round(get_winning_count(len(self.players), len(self.rounds))))
 
             self.state = GameState.PROPOSAL_PENDING
             self._log("Round %s begins", len(self.rounds))
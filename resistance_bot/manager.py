@@ -4,8 +4,9 @@ from typing import Dict
 import telegram
 from telegram.ext import CommandHandler, CallbackContext
 
-from .game import GameError, GameInstance
-from .util import group_only, report_exceptions
+from . import ai
+from .game import GameError, GameInstance, MAX_PLAYERS
+from .util import _, group_only, report_exceptions
 
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,7 @@ class GameManager:
         dispatcher.add_handler(CommandHandler('new_game', self._handle_new_game), group)
         dispatcher.add_handler(CommandHandler('cancel_game', self._handle_cancel_game), group)
         dispatcher.add_handler(CommandHandler('register', self._handle_register), group)
+        dispatcher.add_handler(CommandHandler('add_bot', self._handle_add_bot), group)
 
     def get_game(self, chat: telegram.Chat):
         if chat not in self.games:
@@ -46,6 +48,11 @@ class GameManager:
     def add_player(self, chat: telegram.Chat, user: telegram.User):
         self.get_game(chat).register_player(user)
 
+    def add_ai_player(self, chat: telegram.Chat):
+        user = ai.create_user()
+        self.add_player(chat, user)
+        return user
+
     @group_only
     @report_exceptions(GameError, ManagerError)
     def _handle_new_game(self, update: telegram.Update, context: CallbackContext):
@@ -67,3 +74,24 @@ class GameManager:
     def _handle_register(self, update: telegram.Update, context: CallbackContext):
         self.add_player(update.effective_chat, update.effective_user)
         update.message.reply_text("You are registered now.")
+
+    @group_only
+    @report_exceptions(GameError, ManagerError)
+    def _handle_add_bot(self, update: telegram.Update, context: CallbackContext):
+        game = self.get_game(update.effective_chat)
+        if game.creator != update.effective_user:
+            update.message.reply_text("Only creator can add bots.")
+            return
+
+        requested = 1
+        if context.args:
+            if not context.args[0].isdigit() or int(context.args[0]) < 1:
+                raise GameError("Invalid argument: {0}".format(context.args[0]))
+            requested = int(context.args[0])
+
+        count = min(requested, MAX_PLAYERS - len(game.players))
+        if count < 1:
+            raise GameError("The game is full!")
+
+        names = [self.add_ai_player(update.effective_chat).name for i in range(count)]
+        update.message.reply_text("{0} joined the game.".format(", ".join(names)))
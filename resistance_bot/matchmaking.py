@@ -0,0 +1,277 @@
+import logging
+import time
+from collections import OrderedDict
+from itertools import islice, takewhile
+from typing import Dict, List, Optional, Tuple
+
+import telegram
+from telegram.ext import CommandHandler, TypeHandler, CallbackContext
+
+from .game import GameError, GameInstance, GameState, MIN_PLAYERS, MAX_PLAYERS
+from .manager import ManagerError
+from .util import group_only, private_only, report_exceptions
+
+
+# Seconds of waiting after which the range of game sizes a queued player accepts widens by one
+# in both directions
+WIDEN_INTERVAL = 30
+
+# Seconds a matched game may stay unstarted before its chat is given back to the pool
+MATCH_TIMEOUT = 300
+
+
+logger = logging.getLogger(__name__)
+
+
+class MatchmakingError(Exception):
+    pass
+
+
+class QueueEntry:
+    def __init__(self, user: telegram.User, size: Optional[int], enqueued_at: float):
+        self.user = user
+        self.size = size
+        self.enqueued_at = enqueued_at
+
+    def accepts(self, size: int, now: float):
+        # Players without a preferred size accept any game right away
+        if self.size is None:
+            return True
+        return abs(size - self.size) <= (now - self.enqueued_at) // WIDEN_INTERVAL
+
+
+class MatchQueue:
+    """Players waiting for a quick game, bucketed by their preferred game size.
+
+    Buckets are FIFO, and the longer a player waits, the more sizes they accept, so the entries
+    of a bucket accepting a given size always form its prefix. A match attempt therefore looks
+    at no more than MAX_PLAYERS entries per bucket no matter how long the queue is.
+    """
+
+    def __init__(self):
+        # The None bucket holds players who accept a game of any size
+        self._buckets: Dict[Optional[int], OrderedDict] = {
+            size: OrderedDict() for size in [None, *range(MIN_PLAYERS, MAX_PLAYERS + 1)]}
+        self._entries: Dict[telegram.User, QueueEntry] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user: telegram.User):
+        return user in self._entries
+
+    def push(self, user: telegram.User, size: Optional[int] = None, now: Optional[float] = None):
+        if user in self._entries:
+            raise MatchmakingError("You are already in the queue.")
+        if size is not None and not MIN_PLAYERS <= size <= MAX_PLAYERS:
+            raise MatchmakingError("Game size must be between {0} and {1}!".format(MIN_PLAYERS, MAX_PLAYERS))
+
+        entry = QueueEntry(user, size, time.monotonic() if now is None else now)
+        self._entries[user] = entry
+        self._buckets[size][user] = entry
+
+    def remove(self, user: telegram.User):
+        entry = self._entries.pop(user, None)
+        if entry is None:
+            raise MatchmakingError("You are not in the queue.")
+        del self._buckets[entry.size][user]
+
+    def pop_match(self, now: Optional[float] = None) -> Optional[List[QueueEntry]]:
+        if now is None:
+            now = time.monotonic()
+
+        # Larger games are preferred as they keep more players busy
+        for size in range(MAX_PLAYERS, MIN_PLAYERS - 1, -1):
+            candidates = []
+            for bucket in self._buckets.values():
+                accepting = takewhile(lambda entry: entry.accepts(size, now), bucket.values())
+                candidates.extend(islice(accepting, size))
+
+            if len(candidates) >= size:
+                # Whoever waited longest gets the seat
+                candidates.sort(key=lambda entry: entry.enqueued_at)
+                matched = candidates[:size]
+                for entry in matched:
+                    self.remove(entry.user)
+                return matched
+
+        return None
+
+
+class QueueTimerTick:
+    """Posted to the dispatcher by the queue timer.
+
+    Jobs run on the scheduler's thread, while the queue, the pool and the games are otherwise
+    only touched by handlers on the dispatcher thread. Handling the tick there as well keeps
+    all of them single-threaded without locks.
+    """
+
+
+class Matchmaker:
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = MatchQueue()
+        self.chats: List[telegram.Chat] = []
+        # Matched games that haven't been started yet, with their entries and deadlines
+        self._pending: Dict[telegram.Chat, Tuple[GameInstance, List[QueueEntry], float]] = {}
+
+    def register_handlers(self, dispatcher: telegram.ext.Dispatcher, group=0):
+        dispatcher.add_handler(CommandHandler('queue', self._handle_queue), group)
+        dispatcher.add_handler(CommandHandler('leave_queue', self._handle_leave_queue), group)
+        dispatcher.add_handler(CommandHandler('host_games', self._handle_host_games), group)
+        dispatcher.add_handler(CommandHandler('stop_hosting', self._handle_stop_hosting), group)
+
+        dispatcher.add_handler(TypeHandler(QueueTimerTick, self._handle_queue_timer), group)
+
+        # Widening and match expiry only happen with time, so the queue is revisited periodically
+        if dispatcher.job_queue is not None:
+            dispatcher.job_queue.run_repeating(self._post_queue_timer, WIDEN_INTERVAL)
+
+    def add_chat(self, chat: telegram.Chat):
+        if chat in self.chats:
+            raise MatchmakingError("This chat already hosts quick games.")
+        self.chats.append(chat)
+        logger.info("Chat %s added to the quick game pool", chat.id)
+
+    def remove_chat(self, chat: telegram.Chat):
+        if chat not in self.chats:
+            raise MatchmakingError("This chat doesn't host quick games.")
+        self.chats.remove(chat)
+        logger.info("Chat %s removed from the quick game pool", chat.id)
+
+    def is_playing(self, user: telegram.User):
+        # Pending matches are games of their own, so they are covered as well
+        return any(user in game.players for game in self.bot.gm.games.values())
+
+    def matchmake(self, bot: telegram.Bot):
+        self._expire_matches(bot)
+
+        while True:
+            chat = self._find_free_chat()
+            if chat is None:
+                return
+
+            entries = self.queue.pop_match()
+            if entries is None:
+                return
+
+            self._start_match(bot, chat, entries)
+
+    def _find_free_chat(self):
+        return next((chat for chat in self.chats if chat not in self.bot.gm.games), None)
+
+    def _expire_matches(self, bot: telegram.Bot):
+        now = time.monotonic()
+        for chat, (game, entries, deadline) in list(self._pending.items()):
+            # Started and cancelled games are no longer the matchmaker's business
+            if self.bot.gm.games.get(chat) is not game or game.state != GameState.NOT_STARTED:
+                del self._pending[chat]
+                continue
+            if now < deadline:
+                continue
+
+            del self._pending[chat]
+            self.bot.gm.delete_game(chat)
+            try:
+                bot.send_message(chat.id, "The quick game wasn't started in time and is cancelled.")
+            except telegram.TelegramError as e:
+                self._drop_chat(chat, e)
+
+            # Everyone but the creator who failed to start the game gets back in the queue
+            for entry in self._requeue(entries[1:]):
+                self._notify(bot, entry.user, "The game wasn't started in time. You are back in the queue.")
+
+    def _start_match(self, bot: telegram.Bot, chat: telegram.Chat, entries: List[QueueEntry]):
+        players = [entry.user for entry in entries]
+        game = self.bot.gm.create_game(chat, creator=players[0])
+        for player in players:
+            game.register_player(player)
+        self._pending[chat] = (game, entries, time.monotonic() + MATCH_TIMEOUT)
+        logger.info("Matched %s players into chat %s", len(players), chat.id)
+
+        # A separate link keeps the group's primary one valid and expires with the match
+        try:
+            location = bot.create_chat_invite_link(
+                chat.id, expire_date=int(time.time()) + MATCH_TIMEOUT, member_limit=len(players)).invite_link
+        except telegram.TelegramError:
+            location = chat.title or "the game group"
+
+        try:
+            bot.send_message(
+                chat.id,
+                "*Quick game matched!*\n"
+                "Players: {0}\n\n"
+                "{1}, send /start\\_game once everyone has joined. "
+                "The game is cancelled if it isn't started within {2} minutes.".format(
+                    ", ".join(x.name for x in players), players[0].name, MATCH_TIMEOUT // 60),
+                parse_mode='markdown')
+        except telegram.TelegramError as e:
+            # The bot can't talk in the chat anymore; the players haven't been told about the match yet
+            del self._pending[chat]
+            self.bot.gm.delete_game(chat)
+            self._drop_chat(chat, e)
+            self._requeue(entries)
+            return
+
+        for player in players:
+            self._notify(bot, player, "A game is found! Join {0} to play.".format(location))
+
+    def _drop_chat(self, chat: telegram.Chat, error: telegram.TelegramError):
+        if chat in self.chats:
+            self.chats.remove(chat)
+        logger.warning("Chat %s removed from the quick game pool: %s", chat.id, error)
+
+    def _requeue(self, entries: List[QueueEntry]):
+        requeued = [entry for entry in entries if entry.user not in self.queue]
+        for entry in requeued:
+            self.queue.push(entry.user, entry.size)
+        return requeued
+
+    @staticmethod
+    def _notify(bot: telegram.Bot, user: telegram.User, text: str):
+        try:
+            bot.send_message(user.id, text)
+        except telegram.TelegramError as e:
+            logger.warning("Couldn't notify player %s: %s", user.name, e)
+
+    @private_only
+    @report_exceptions(MatchmakingError, GameError, ManagerError)
+    def _handle_queue(self, update: telegram.Update, context: CallbackContext):
+        size = None
+        if context.args:
+            if not context.args[0].isdigit():
+                raise MatchmakingError("Invalid argument: {0}".format(context.args[0]))
+            size = int(context.args[0])
+
+        if self.is_playing(update.effective_user):
+            raise MatchmakingError("You are already in a game.")
+
+        self.queue.push(update.effective_user, size)
+        update.message.reply_text("You are in the queue now. Send /leave_queue to leave it.")
+        self.matchmake(context.bot)
+
+    @private_only
+    @report_exceptions(MatchmakingError)
+    def _handle_leave_queue(self, update: telegram.Update, context: CallbackContext):
+        self.queue.remove(update.effective_user)
+        update.message.reply_text("You have left the queue.")
+
+    @group_only
+    @report_exceptions(MatchmakingError, GameError, ManagerError)
+    def _handle_host_games(self, update: telegram.Update, context: CallbackContext):
+        self.add_chat(update.effective_chat)
+        update.message.reply_text("This chat will now host quick games. Send /stop_hosting to stop.")
+        self.matchmake(context.bot)
+
+    @group_only
+    @report_exceptions(MatchmakingError)
+    def _handle_stop_hosting(self, update: telegram.Update, context: CallbackContext):
+        self.remove_chat(update.effective_chat)
+        update.message.reply_text("This chat no longer hosts quick games.")
+
+    @staticmethod
+    def _post_queue_timer(context: CallbackContext):
+        context.dispatcher.update_queue.put(QueueTimerTick())
+
+    def _handle_queue_timer(self, update: QueueTimerTick, context: CallbackContext):
+        self.matchmake(context.bot)
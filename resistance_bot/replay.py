@@ -0,0 +1,348 @@
+"""Recording of live update streams and their replay against a local fake Bot API.
+
+Captures are gzipped JSON lines, one update per line together with its offset in seconds
+from the first recorded update. Updates are reduced to the fields the handlers use, user and
+chat identities are remapped on the fly, and only commands keep their text.
+
+Replay a capture with:
+
+    python -m resistance_bot.replay capture.jsonl.gz --speed 10
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import telegram
+
+
+# Fields kept in captures, per kind of object, limited to what the handlers look at. Everything
+# else (forwards, contacts, locations, polls, signatures, ...) is dropped
+UPDATE_FIELDS = ['update_id', 'message', 'edited_message', 'callback_query']
+MESSAGE_FIELDS = ['message_id', 'date', 'chat', 'from']
+CALLBACK_QUERY_FIELDS = ['id', 'from', 'chat_instance', 'data', 'message']
+
+# Command arguments other than numbers and mentions are replaced with this placeholder
+REDACTED_ARGUMENT = '?'
+
+# Token used by the replayed bot; the fake Bot API accepts anything
+REPLAY_TOKEN = '123456:replay'
+
+# Username the fake Bot API reports for the replayed bot. Commands addressed to the recorded
+# bot are readdressed to it so that they still reach the command handlers
+REPLAY_BOT_USERNAME = 'resistance_bot'
+
+
+logger = logging.getLogger(__name__)
+
+
+class Anonymizer:
+    """Reduces update dicts to the fields the handlers use, with identities remapped.
+
+    Only messages starting with a command keep their text, rebuilt from the command and its
+    numeric and mention arguments.
+    """
+
+    def __init__(self, bot_username: Optional[str] = None):
+        self.bot_username = bot_username
+        # Private chats share ids with their users, so both are kept in the same mapping
+        self._ids: Dict[int, int] = {}
+        self._usernames: Dict[str, str] = {}
+        self._chat_instances: Dict[str, str] = {}
+
+    def anonymize(self, update: dict):
+        result = {k: update[k] for k in UPDATE_FIELDS if k in update}
+        for key in ['message', 'edited_message']:
+            if key in result:
+                result[key] = self._anonymize_message(result[key])
+        if 'callback_query' in result:
+            result['callback_query'] = self._anonymize_callback_query(result['callback_query'])
+        return result
+
+    def _anonymize_message(self, message: dict):
+        result = {k: message[k] for k in MESSAGE_FIELDS if k in message}
+        result['chat'] = self._anonymize_chat(message['chat'])
+        if 'from' in message:
+            result['from'] = self._anonymize_user(message['from'])
+
+        entities = message.get('entities', [])
+        command = next((x for x in entities if x['type'] == 'bot_command' and x['offset'] == 0), None)
+        if 'text' in message and command is not None:
+            result['text'], result['entities'] = self._rewrite_command(message['text'], command, entities)
+
+        return result
+
+    def _anonymize_callback_query(self, query: dict):
+        result = {k: query[k] for k in CALLBACK_QUERY_FIELDS if k in query}
+        result['from'] = self._anonymize_user(query['from'])
+        result['chat_instance'] = self._map_chat_instance(query['chat_instance'])
+        if 'message' in query:
+            result['message'] = self._anonymize_message(query['message'])
+        return result
+
+    def _anonymize_user(self, user: dict):
+        result = {'id': self._map_id(user['id']), 'is_bot': user['is_bot']}
+        result['first_name'] = "User {0}".format(result['id'])
+        if 'username' in user:
+            result['username'] = self._map_username(user['username'])
+        return result
+
+    def _anonymize_chat(self, chat: dict):
+        result = {'id': self._map_id(chat['id']), 'type': chat['type']}
+        if 'title' in chat:
+            result['title'] = "Chat {0}".format(abs(result['id']))
+        if 'username' in chat:
+            result['username'] = self._map_username(chat['username'])
+        return result
+
+    def _rewrite_command(self, text: str, command: dict, entities: List[dict]):
+        # Entity offsets and lengths are measured in UTF-16 code units
+        units = text.encode('utf-16-le')
+
+        def substring(start, end=None):
+            return units[start * 2:None if end is None else end * 2].decode('utf-16-le')
+
+        mentions = {substring(x['offset'], x['offset'] + x['length']) for x in entities if x['type'] == 'mention'}
+
+        name = substring(0, command['length'])
+        if '@' in name:
+            name, username = name.split('@', 1)
+            name = "{0}@{1}".format(name, self._map_username(username))
+
+        arguments = []
+        for argument in substring(command['length']).split():
+            if argument in mentions:
+                arguments.append('@' + self._map_username(argument[1:]))
+            elif argument.isascii() and argument.isdigit():
+                arguments.append(argument)
+            else:
+                arguments.append(REDACTED_ARGUMENT)
+
+        # The rebuilt text is ASCII, so string offsets match UTF-16 ones
+        rewritten = [{'type': 'bot_command', 'offset': 0, 'length': len(name)}]
+        position = len(name) + 1
+        for argument in arguments:
+            if argument.startswith('@'):
+                rewritten.append({'type': 'mention', 'offset': position, 'length': len(argument)})
+            position += len(argument) + 1
+
+        return ' '.join([name] + arguments), rewritten
+
+    def _map_id(self, value: int):
+        if value not in self._ids:
+            new_id = len(self._ids) + 1
+            self._ids[value] = new_id if value > 0 else -new_id
+        return self._ids[value]
+
+    def _map_username(self, username: str):
+        # Usernames are case-insensitive
+        key = username.lower()
+        if self.bot_username and key == self.bot_username.lower():
+            return REPLAY_BOT_USERNAME
+        if key not in self._usernames:
+            self._usernames[key] = "user{0}".format(len(self._usernames) + 1)
+        return self._usernames[key]
+
+    def _map_chat_instance(self, value: str):
+        if value not in self._chat_instances:
+            self._chat_instances[value] = str(len(self._chat_instances) + 1)
+        return self._chat_instances[value]
+
+
+class UpdateRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._anonymizer = Anonymizer()
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, update: telegram.Update, bot_username: Optional[str] = None):
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+
+            if bot_username:
+                self._anonymizer.bot_username = bot_username
+            line = {'t': round(now - self._started, 3), 'u': self._anonymizer.anonymize(update.to_dict())}
+            self._file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        logger.info("Update capture saved to %s", self.path)
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, dict]]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                line = json.loads(line)
+                yield line['t'], line['u']
+        except EOFError:
+            # The capture wasn't closed properly (e.g. the bot was killed); keep what was written
+            logger.warning("Capture %s is truncated", path)
+
+
+class FakeBotAPI:
+    """Local HTTP server answering Bot API calls with plausible results."""
+
+    BOT_USER = {'id': 1, 'is_bot': True, 'first_name': "Resistance Bot", 'username': REPLAY_BOT_USERNAME}
+    INVITE_LINK = 'https://t.me/joinchat/replay'
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.calls: Dict[str, int] = {}
+        self._message_ids = count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{0}:{1}/bot".format(host, port)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, params: dict):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == 'getMe':
+            return FakeBotAPI.BOT_USER
+        if method in ['sendMessage', 'editMessageText']:
+            chat_id = int(params.get('chat_id', 0))
+            return {
+                'message_id': int(params.get('message_id') or next(self._message_ids)),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+                'text': params.get('text', ''),
+            }
+        if method == 'exportChatInviteLink':
+            return FakeBotAPI.INVITE_LINK
+        if method == 'createChatInviteLink':
+            return {'invite_link': FakeBotAPI.INVITE_LINK, 'creator': FakeBotAPI.BOT_USER,
+                    'is_primary': False, 'is_revoked': False}
+        return True
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.rsplit('/', 1)[-1]
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    params = json.loads(body) if body else {}
+                except ValueError:
+                    # Multipart uploads aren't inspected
+                    params = {}
+
+                response = json.dumps({'ok': True, 'result': api.handle(method, params)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class ReplayStats:
+    def __init__(self, latencies: List[float], elapsed: float):
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p: float):
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(len(self.latencies) - 1, int(len(self.latencies) * p / 100))]
+
+    def __str__(self):
+        return (
+            "{0} updates in {1:.2f} s ({2:.1f} updates/s)\n"
+            "latency: p50 {3:.2f} ms, p95 {4:.2f} ms, p99 {5:.2f} ms, max {6:.2f} ms"
+        ).format(
+            len(self.latencies), self.elapsed, self.throughput,
+            self.percentile(50) * 1000, self.percentile(95) * 1000, self.percentile(99) * 1000,
+            self.percentile(100) * 1000)
+
+
+def replay(bot, path: str, speed: Optional[float] = 1.0) -> ReplayStats:
+    """Feeds a capture into the bot's dispatcher, keeping the recorded timing scaled by `speed`.
+
+    Updates are processed one by one, and latency is measured from the moment an update was
+    scheduled to arrive, so time spent waiting behind slower updates counts as well. With `speed`
+    of None updates are fed as fast as possible and latency only covers processing.
+    """
+    dispatcher = bot.dispatcher
+    latencies = []
+
+    started = time.perf_counter()
+    for offset, data in read_capture(path):
+        if speed:
+            arrival = started + offset / speed
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            arrival = time.perf_counter()
+
+        update = telegram.Update.de_json(data, dispatcher.bot)
+        dispatcher.process_update(update)
+        latencies.append(time.perf_counter() - arrival)
+
+    return ReplayStats(latencies, time.perf_counter() - started)
+
+
+def main():
+    from .core import ResistanceBot
+
+    parser = argparse.ArgumentParser(description="Replay a recorded update stream against a fake Bot API.")
+    parser.add_argument('capture', help="path to a capture recorded with RESISTANCE_BOT_RECORD")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--speed', type=float, default=1.0, help="replay speed multiplier (default: 1)")
+    group.add_argument('--max-speed', action='store_true', help="replay as fast as possible")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    api = FakeBotAPI()
+    api.start()
+    try:
+        bot = ResistanceBot(REPLAY_TOKEN, base_url=api.base_url)
+        stats = replay(bot, args.capture, None if args.max_speed else args.speed)
+    finally:
+        api.stop()
+
+    print(stats)
+    print("Bot API calls: {0}".format(", ".join("{0} {1}".format(k, v) for k, v in sorted(api.calls.items()))))
+
+
+if __name__ == '__main__':
+    main()
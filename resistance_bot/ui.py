@@ -2,18 +2,13 @@ import random
 from functools import wraps
 
 import telegram.ext
-from emoji import emojize
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CommandHandler, CallbackQueryHandler, CallbackContext
 
+from . import ai
 from .manager import ManagerError
 from .game import GameError, GameInstance, GameState
-from .util import group_only, report_exceptions
-
-
-# TODO: Replace with gettext (also wrap other strings)
-def _(s):
-    return emojize(s, use_aliases=True)
+from .util import _, group_only, report_exceptions
 
 
 class UI:
@@ -100,9 +95,28 @@ class UI:
             parse_mode='markdown',
             reply_markup=UI._construct_party_vote_markup())
 
-        if game.state != GameState.PARTY_VOTE_RESULTS:
-            return
+        if game.state == GameState.PARTY_VOTE_RESULTS:
+            self._finish_party_vote(context, game)
+
+    def mission_vote(self, update: telegram.Update, context: CallbackContext, game: GameInstance):
+        query = update.callback_query
+        red = query.data == 'mission_vote_red'
+        game.vote_mission(update.effective_user, red)
+
+        if red:
+            query.answer(_("Voted :red_circle:"))
+        else:
+            query.answer(_("Voted :black_circle:"))
 
+        query.message.edit_text(
+            UI._get_mission_vote_message(game),
+            parse_mode='markdown',
+            reply_markup=UI._construct_mission_vote_markup())
+
+        if game.state == GameState.MISSION_VOTE_RESULTS:
+            self._finish_mission_vote(context, game)
+
+    def _finish_party_vote(self, context: CallbackContext, game: GameInstance):
         self._report_party_vote_outcome(context, game)
         prev_round_no = len(game.rounds)
         game.next_state()
@@ -122,24 +136,7 @@ class UI:
             self._report_game_outcome(context, game)
             self.bot.gm.delete_game(game.chat)
 
-    def mission_vote(self, update: telegram.Update, context: CallbackContext, game: GameInstance):
-        query = update.callback_query
-        red = query.data == 'mission_vote_red'
-        game.vote_mission(update.effective_user, red)
-
-        if red:
-            query.answer(_("Voted :red_circle:"))
-        else:
-            query.answer(_("Voted :black_circle:"))
-
-        query.message.edit_text(
-            UI._get_mission_vote_message(game),
-            parse_mode='markdown',
-            reply_markup=UI._construct_mission_vote_markup())
-
-        if game.state != GameState.MISSION_VOTE_RESULTS:
-            return
-
+    def _finish_mission_vote(self, context: CallbackContext, game: GameInstance):
         self._report_mission_vote_outcome(context, game)
         game.next_state()
         if game.state == GameState.PROPOSAL_PENDING:
@@ -159,6 +156,14 @@ class UI:
             parse_mode='markdown')
 
     def _show_proposal_prompt(self, context: CallbackContext, game: GameInstance):
+        if ai.is_ai(game.leader):
+            ai.play(game, game.leader)
+            context.bot.send_message(
+                game.chat.id,
+                "{0} proposes a party: {1}".format(game.leader.name, ", ".join(x.name for x in game.current_party)))
+            self._show_party_vote_prompt(context, game)
+            return
+
         player_list = "\n".join("{0}. {1}".format(i, x.name) for i, x in enumerate(game.players, 1))
         context.bot.send_message(
             game.chat.id,
@@ -170,19 +175,27 @@ class UI:
         )
 
     def _show_party_vote_prompt(self, context: CallbackContext, game: GameInstance):
+        ai.play_all(game)
         context.bot.send_message(
             game.chat.id,
             UI._get_party_vote_message(game),
             parse_mode='markdown',
             reply_markup=UI._construct_party_vote_markup())
 
+        if game.state == GameState.PARTY_VOTE_RESULTS:
+            self._finish_party_vote(context, game)
+
     def _show_mission_vote_prompt(self, context: CallbackContext, game: GameInstance):
+        ai.play_all(game)
         context.bot.send_message(
             game.chat.id,
             UI._get_mission_vote_message(game),
             parse_mode='markdown',
             reply_markup=UI._construct_mission_vote_markup())
 
+        if game.state == GameState.MISSION_VOTE_RESULTS:
+            self._finish_mission_vote(context, game)
+
     def _report_party_vote_outcome(self, context: CallbackContext, game: GameInstance):
         caption = "Vote succeeded!" if game.current_vote.outcome else "Vote failed."
 
@@ -1,5 +1,5 @@
 import logging
-from functools import wraps
+from functools import lru_cache, wraps
 
 import telegram
 from telegram.ext import CallbackContext
@@ -8,6 +8,14 @@ from telegram.ext import CallbackContext
 logger = logging.getLogger(__name__)
 
 
+# TODO: Replace with gettext (also wrap other strings)
+@lru_cache(maxsize=None)
+def _(s):
+    # emoji builds its whole code table on import, so it's loaded with the first message rendered
+    from emoji import emojize
+    return emojize(s, use_aliases=True)
+
+
 def group_only(handler):
     @wraps(handler)
     def decorated_handler(self, update: telegram.Update, context: CallbackContext):
@@ -19,6 +27,17 @@ def group_only(handler):
     return decorated_handler
 
 
+def private_only(handler):
+    @wraps(handler)
+    def decorated_handler(self, update: telegram.Update, context: CallbackContext):
+        if update.message.chat.type != 'private':
+            update.message.reply_text("Send this command to the bot in a private chat.")
+            return
+        handler(self, update, context)
+
+    return decorated_handler
+
+
 def report_exceptions(*args):
     def decorator(handler):
         @wraps(handler)
@@ -9,7 +9,9 @@ LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
 def main():
     logging.basicConfig(format=LOG_FORMAT, level=logging.DEBUG)
-    bot = ResistanceBot(os.environ.get('RESISTANCE_BOT_TOKEN'))
+    bot = ResistanceBot(
+        os.environ.get('RESISTANCE_BOT_TOKEN'),
+        record_path=os.environ.get('RESISTANCE_BOT_RECORD'))
     bot.run()
 
 
@@ -0,0 +1,95 @@
+import pytest
+
+telegram = pytest.importorskip('telegram')
+
+from resistance_bot import ai  # noqa: E402
+from resistance_bot.game import GameInstance, GameState, PARTY_SIZES, VOTE_LIMIT  # noqa: E402
+
+
+def make_humans(count, start=1):
+    return [telegram.User(i, "User {0}".format(i), is_bot=False) for i in range(start, start + count)]
+
+
+def start_game(players, spies):
+    game = GameInstance(telegram.Chat(-1, 'group'))
+    for player in players:
+        game.register_player(player)
+    game.next_state()
+    # Spies are picked at random, override them to make the game deterministic
+    game.spies = list(spies)
+    return game
+
+
+def propose_and_vote(game, party, outcome):
+    game.propose_party(game.leader, party)
+    for player in game.players:
+        game.vote_party(player, outcome)
+    game.next_state()
+
+
+def test_round_rules_match_the_game():
+    for player_count in PARTY_SIZES:
+        players = make_humans(player_count)
+        spy_count = (player_count + 2) // 3
+        game = start_game(players, players[:spy_count])
+
+        # Alternate successful and failed missions so that every round gets played
+        for round_idx in range(len(PARTY_SIZES[player_count])):
+            assert ai.ROUND_RULES[player_count][round_idx] == (game.current_party_size, game.current_winning_count)
+
+            party = players[:game.current_party_size]
+            propose_and_vote(game, party, True)
+            for player in party:
+                game.vote_mission(player, not (round_idx % 2 and player in game.spies))
+            game.next_state()
+
+        assert game.state == GameState.GAME_OVER
+
+
+def test_ai_spy_doesnt_rely_on_human_spy():
+    human = make_humans(1)[0]
+    spy = ai.create_user()
+    others = [ai.create_user() for _ in range(3)]
+    game = start_game([human, spy] + others, [human, spy])
+
+    propose_and_vote(game, [human, spy], True)
+
+    assert game.state == GameState.MISSION_VOTE_IN_PROGRESS
+    assert ai.SpyStrategy.vote_mission(game, spy) is False
+
+
+def test_ai_spies_play_only_needed_black_cards():
+    spies = [ai.create_user() for _ in range(2)]
+    others = [ai.create_user() for _ in range(3)]
+    game = start_game(spies + others, spies)
+
+    propose_and_vote(game, spies, True)
+
+    assert [ai.SpyStrategy.vote_mission(game, x) for x in spies] == [False, True]
+
+
+def test_last_vote():
+    spy, r1, r2, r3, r4 = players = [ai.create_user() for _ in range(5)]
+    game = start_game(players, [spy, r4])
+
+    # A failed first mission makes the resistance suspicious of its members
+    propose_and_vote(game, [spy, r1], True)
+    game.vote_mission(spy, False)
+    game.vote_mission(r1, True)
+    game.next_state()
+
+    party = [spy, r1, r3]
+    for vote_idx in range(VOTE_LIMIT - 1):
+        game.propose_party(game.leader, party)
+        if vote_idx == 0:
+            assert ai.ResistanceStrategy.vote_party(game, r2) is False
+            assert ai.SpyStrategy.vote_party(game, spy) is True
+        for player in players:
+            game.vote_party(player, False)
+        game.next_state()
+
+    # Rejecting the last proposal would give the round to the spies
+    game.propose_party(game.leader, party)
+    assert game.leader == r4
+    assert ai.ResistanceStrategy.vote_party(game, r2) is True
+    assert ai.SpyStrategy.vote_party(game, spy) is False
@@ -0,0 +1,87 @@
+import pytest
+
+telegram = pytest.importorskip('telegram')
+
+from resistance_bot.matchmaking import MatchQueue, MatchmakingError, WIDEN_INTERVAL  # noqa: E402
+
+
+def make_users(count, start=1):
+    return [telegram.User(i, "User {0}".format(i), is_bot=False) for i in range(start, start + count)]
+
+
+def matched_users(entries):
+    return [entry.user for entry in entries]
+
+
+def test_any_size_players_match_immediately():
+    queue = MatchQueue()
+    users = make_users(5)
+    for user in users:
+        queue.push(user, now=0)
+
+    assert matched_users(queue.pop_match(now=0)) == users
+    assert len(queue) == 0
+
+
+def test_preferred_size_widens_with_waiting():
+    queue = MatchQueue()
+    users = make_users(5)
+    for user in users:
+        queue.push(user, 7, now=0)
+
+    # Five players only make a game of five, which is two sizes away from the preferred one
+    assert queue.pop_match(now=0) is None
+    assert queue.pop_match(now=WIDEN_INTERVAL) is None
+    assert matched_users(queue.pop_match(now=2 * WIDEN_INTERVAL)) == users
+
+
+def test_preferred_size_matches_exactly_without_waiting():
+    queue = MatchQueue()
+    users = make_users(6)
+    for user in users:
+        queue.push(user, 6, now=0)
+
+    assert matched_users(queue.pop_match(now=0)) == users
+
+
+def test_larger_games_are_preferred():
+    queue = MatchQueue()
+    users = make_users(8)
+    for user in users:
+        queue.push(user, now=0)
+
+    assert len(queue.pop_match(now=0)) == 8
+
+
+def test_longest_waiting_players_are_matched_first():
+    queue = MatchQueue()
+    users = make_users(7)
+    # Alternate any-size players with players preferring five, who can't join larger games yet
+    for i, user in enumerate(users):
+        queue.push(user, None if i % 2 == 0 else 5, now=i)
+
+    assert matched_users(queue.pop_match(now=10)) == users[:5]
+    assert users[5] in queue and users[6] in queue
+
+
+def test_removed_players_are_not_matched():
+    queue = MatchQueue()
+    users = make_users(6)
+    for user in users:
+        queue.push(user, now=0)
+    queue.remove(users[0])
+
+    assert matched_users(queue.pop_match(now=0)) == users[1:]
+
+
+def test_invalid_pushes_are_rejected():
+    queue = MatchQueue()
+    user, = make_users(1)
+    queue.push(user)
+
+    with pytest.raises(MatchmakingError):
+        queue.push(user)
+    with pytest.raises(MatchmakingError):
+        queue.push(make_users(1, start=2)[0], 11)
+    with pytest.raises(MatchmakingError):
+        queue.remove(make_users(1, start=3)[0])
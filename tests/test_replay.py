@@ -0,0 +1,113 @@
+import pytest
+
+telegram = pytest.importorskip('telegram')
+
+from resistance_bot.replay import Anonymizer, FakeBotAPI, REPLAY_BOT_USERNAME  # noqa: E402
+
+
+ALICE = {'id': 1001, 'is_bot': False, 'first_name': "Alice", 'last_name': "Smith", 'username': 'alice_s',
+         'language_code': 'en'}
+GROUP = {'id': -100500, 'type': 'supergroup', 'title': "Alice's friends", 'username': 'alices_friends'}
+
+
+def command_update(text, entities, chat=GROUP, **extra):
+    message = {'message_id': 7, 'date': 1600000000, 'chat': chat, 'from': ALICE, 'text': text,
+               'entities': entities}
+    message.update(extra)
+    return {'update_id': 1, 'message': message}
+
+
+def entity_text(message, entity):
+    units = message['text'].encode('utf-16-le')
+    return units[entity['offset'] * 2:(entity['offset'] + entity['length']) * 2].decode('utf-16-le')
+
+
+def test_identities_are_remapped_consistently():
+    anonymizer = Anonymizer()
+    group = anonymizer.anonymize(command_update('/register', [{'type': 'bot_command', 'offset': 0, 'length': 9}]))
+    private = anonymizer.anonymize(command_update(
+        '/queue', [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+        chat={'id': 1001, 'type': 'private', 'first_name': "Alice"}))
+
+    user = group['message']['from']
+    assert group['message']['chat'] == {'id': -1, 'type': 'supergroup', 'title': "Chat 1", 'username': 'user1'}
+    assert user == {'id': 2, 'is_bot': False, 'first_name': "User 2", 'username': 'user2'}
+    # Private chats share ids with their users
+    assert private['message']['chat'] == {'id': 2, 'type': 'private'}
+    assert private['message']['from'] == user
+
+
+def test_unused_fields_are_dropped():
+    update = command_update(
+        '/register', [{'type': 'bot_command', 'offset': 0, 'length': 9}],
+        forward_sender_name="Dave Real", author_signature="Dave", migrate_to_chat_id=-100600,
+        contact={'user_id': 1002, 'first_name': "Dave", 'phone_number': '+100'},
+        location={'latitude': 1.0, 'longitude': 2.0},
+        poll={'id': '1', 'question': "Dave?", 'options': []})
+    update['channel_post'] = {'message_id': 8}
+
+    result = Anonymizer().anonymize(update)
+
+    assert set(result) == {'update_id', 'message'}
+    assert set(result['message']) == {'message_id', 'date', 'chat', 'from', 'text', 'entities'}
+
+
+def test_non_command_text_is_dropped():
+    result = Anonymizer().anonymize(command_update(
+        "Alice Smith, Bob Jones, @carol", [{'type': 'mention', 'offset': 24, 'length': 6}]))
+
+    assert 'text' not in result['message']
+    assert 'entities' not in result['message']
+
+
+def test_callback_queries_lose_message_text_and_chat_instance():
+    bot_user = {'id': 42, 'is_bot': True, 'first_name': "Resistance", 'username': 'RealResBot'}
+    update = {'update_id': 2, 'callback_query': {
+        'id': '99', 'from': ALICE, 'chat_instance': '-8812345', 'data': 'party_vote_affirmative',
+        'message': {'message_id': 3, 'date': 1600000000, 'chat': GROUP, 'from': bot_user,
+                    'text': "Please vote for party proposal: Alice Smith, Bob Jones"}}}
+
+    result = Anonymizer('RealResBot').anonymize(update)['callback_query']
+
+    assert result['chat_instance'] == '1'
+    assert result['data'] == 'party_vote_affirmative'
+    assert 'text' not in result['message']
+    assert result['message']['from']['username'] == REPLAY_BOT_USERNAME
+
+
+def test_commands_are_readdressed_to_the_replay_bot():
+    anonymizer = Anonymizer('RealResBot')
+    own = anonymizer.anonymize(command_update(
+        '/register@realresbot', [{'type': 'bot_command', 'offset': 0, 'length': 20}]))
+    other = anonymizer.anonymize(command_update(
+        '/register@OtherBot', [{'type': 'bot_command', 'offset': 0, 'length': 18}]))
+
+    assert own['message']['text'] == '/register@' + REPLAY_BOT_USERNAME
+    assert own['message']['entities'] == [{'type': 'bot_command', 'offset': 0, 'length': 24}]
+    assert other['message']['text'] == '/register@user3'
+
+
+def test_command_arguments_are_rewritten_with_utf16_offsets():
+    # The emoji takes two UTF-16 code units, shifting the mention's offset
+    text = '/select@RealResBot \U0001F600 @carol 2 Alice'
+    entities = [
+        {'type': 'bot_command', 'offset': 0, 'length': 18},
+        {'type': 'mention', 'offset': 22, 'length': 6},
+    ]
+
+    message = Anonymizer('RealResBot').anonymize(command_update(text, entities))['message']
+
+    assert message['text'] == '/select@resistance_bot ? @user3 2 ?'
+    assert [entity_text(message, x) for x in message['entities']] == ['/select@resistance_bot', '@user3']
+    assert [x['type'] for x in message['entities']] == ['bot_command', 'mention']
+
+
+def test_fake_api_returns_parsable_invite_links():
+    api = FakeBotAPI()
+    api.start()
+    try:
+        result = api.handle('createChatInviteLink', {'chat_id': -1})
+    finally:
+        api.stop()
+
+    assert telegram.ChatInviteLink.de_json(result, None).invite_link == FakeBotAPI.INVITE_LINK